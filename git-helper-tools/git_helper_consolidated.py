@@ -2,8 +2,10 @@
 # Consolidated Git Helper Tool
 
 import os
+import shlex
 import subprocess
 import sys
+import tempfile
 from datetime import datetime
 from colorama import Fore, Style, init
 from prompt_toolkit import prompt
@@ -123,7 +125,7 @@ def list_branches():
             
     return local_branches, remote_branches, all_branches
 
-def prompt_push_changes(set_upstream=False, branch_name=None):
+def prompt_push_changes():
     """Prompt the user to push changes to the remote repository."""
     # Check if a remote is configured
     remote_result = run_git_command(["git", "remote"], check=False)
@@ -143,52 +145,45 @@ def prompt_push_changes(set_upstream=False, branch_name=None):
         else:
             return
     
-    # Get current branch
-    branch_result = run_git_command(["git", "branch", "--show-current"], check=False)
-    current_branch = branch_result.stdout.strip() if branch_result else ""
-    
-    if not branch_name:
-        branch_name = current_branch
-    
-    # Check if the branch exists on the remote
-    branch_exists_on_remote = False
-    if branch_name:
-        remote_branches_result = run_git_command(["git", "branch", "-r"], check=False)
-        if remote_branches_result:
-            remote_branches = remote_branches_result.stdout.strip().split("\n")
-            branch_exists_on_remote = any(f"origin/{branch_name}" in branch for branch in remote_branches)
-    
+    # Show exactly which branches will be pushed before asking
+    plan = plan_push()
+    branches = [branch for targets in plan.values() for branch, _, _ in targets]
+    if not branches:
+        print(Fore.GREEN + "Nothing to push.")
+        return
+    print(Fore.CYAN + f"Branches to push: {', '.join(branches)}")
+
     while True:
         push_choice = input("Would you like to push your changes to the remote repository? (y/n): ").strip().lower()
         if push_choice == 'y':
-            # Set appropriate push command based on branch status
-            if set_upstream or (branch_name and not branch_exists_on_remote):
-                print(Fore.CYAN + f"Setting up tracking for branch '{branch_name}' to remote...")
-                run_git_command(["git", "push", "--set-upstream", "origin", branch_name], 
-                               f"Failed to push and set upstream for branch {branch_name}.", 
-                               "Changes pushed and upstream set successfully.")
+            # One push connection; not atomic, so an unrelated stale branch cannot block the others
+            failed = rejection_causes(push_all(branches, atomic=False))
+            
+            # If push fails due to divergent branches, offer to force push or pull
+            if failed:
+                print(Fore.YELLOW + "Push failed. Remote and local branches have diverged for:")
+                for branch, reason in failed.items():
+                    print(Fore.YELLOW + f"  {branch} ({reason})")
+                resolution = input("Would you like to: (1) Force Push (dangerous), (2) Pull then Push, or (3) Cancel?: ").strip()
+                if resolution == "1":
+                    print(Fore.RED + f"Force push will overwrite the remote version of: {', '.join(failed)}")
+                    confirm = input(Fore.RED + "Warning: Force push will overwrite remote changes. Continue? (y/n): ").strip().lower()
+                    if confirm == 'y':
+                        still_failed = push_all(list(failed), force=True, atomic=False)
+                        if still_failed:
+                            print(Fore.RED + f"Force push failed for: {', '.join(still_failed)}")
+                        else:
+                            print(Fore.GREEN + "Changes force-pushed successfully.")
+                elif resolution == "2":
+                    # Only the checked out branch can be rebased with pull --rebase
+                    current = git_plumbing(["symbolic-ref", "--quiet", "--short", "HEAD"]).stdout.strip()
+                    others = [branch for branch in failed if branch != current]
+                    if current in failed and not push_all([current], rebase=True):
+                        print(Fore.GREEN + "Changes pushed successfully.")
+                    if others:
+                        print(Fore.YELLOW + f"Check out and pull these branches manually: {', '.join(others)}")
             else:
-                push_result = run_git_command(["git", "push"], 
-                                             "Failed to push changes.", 
-                                             "Changes pushed successfully.")
-                
-                # If push fails due to divergent branches, offer to force push or pull
-                if not push_result:
-                    print(Fore.YELLOW + "Push failed. Remote and local branches have diverged.")
-                    resolution = input("Would you like to: (1) Force Push (dangerous), (2) Pull then Push, or (3) Cancel?: ").strip()
-                    if resolution == "1":
-                        confirm = input(Fore.RED + "Warning: Force push will overwrite remote changes. Continue? (y/n): ").strip().lower()
-                        if confirm == 'y':
-                            run_git_command(["git", "push", "--force"], 
-                                          "Failed to force push changes.", 
-                                          "Changes force-pushed successfully.")
-                    elif resolution == "2":
-                        run_git_command(["git", "pull", "--rebase"], 
-                                      "Failed to pull changes.", 
-                                      "Changes pulled successfully.")
-                        run_git_command(["git", "push"], 
-                                      "Failed to push changes.", 
-                                      "Changes pushed successfully.")
+                print(Fore.GREEN + "Changes pushed successfully.")
             break
         elif push_choice == 'n':
             print(Fore.YELLOW + "Changes were not pushed to the remote repository.")
@@ -381,6 +376,572 @@ def show_simple_menu(title, options, show_back=True):
 
     return choice
 
+# ==================== History Editing ====================
+
+# Identity for the throwaway commits used to emulate merge-tree --merge-base on older git
+SCRATCH_IDENTITY = {
+    "GIT_AUTHOR_NAME": "git-helper", "GIT_AUTHOR_EMAIL": "git-helper@localhost",
+    "GIT_COMMITTER_NAME": "git-helper", "GIT_COMMITTER_EMAIL": "git-helper@localhost",
+}
+
+def git_plumbing(args, input_text=None, env=None):
+    """Run a git plumbing command quietly and return the CompletedProcess."""
+    return subprocess.run(["git"] + args, input=input_text, env=env,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+def merge_tree_supports_merge_base():
+    """Check whether this git has 'merge-tree --merge-base' (git 2.40+)."""
+    help_result = git_plumbing(["merge-tree", "-h"])
+    return "--merge-base" in help_result.stdout + help_result.stderr
+
+def commit_tree(tree, parents, message, env=None):
+    """Create a commit object from a tree without touching any ref."""
+    args = ["commit-tree", tree]
+    for parent in parents:
+        args += ["-p", parent]
+    result = git_plumbing(args, input_text=message, env=env)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or "git commit-tree failed")
+    return result.stdout.strip()
+
+def merge_in_memory(base, ours, theirs, native_merge_base):
+    """
+    Three-way merge of commits in the object database.
+
+    Args:
+        base (str): Commit to use as the merge base.
+        ours (str): Commit whose changes are kept as the starting point.
+        theirs (str): Commit whose changes relative to base are applied.
+        native_merge_base (bool): Whether git supports 'merge-tree --merge-base'.
+
+    Returns:
+        (tree, conflicts) where tree is the resulting tree id and conflicts
+        is a list of conflicted paths (empty on a clean merge).
+    """
+    if native_merge_base:
+        args = ["merge-tree", "--write-tree", "--name-only", "--no-messages",
+                f"--merge-base={base}", ours, theirs]
+    else:
+        # Re-parent the trees onto a parentless copy of base so that it is the only merge base
+        env = dict(os.environ, **SCRATCH_IDENTITY)
+        scratch_base = commit_tree(f"{base}^{{tree}}", [], "merge base", env)
+        scratch_ours = commit_tree(f"{ours}^{{tree}}", [scratch_base], "ours", env)
+        scratch_theirs = commit_tree(f"{theirs}^{{tree}}", [scratch_base], "theirs", env)
+        args = ["merge-tree", "--write-tree", "--name-only", "--no-messages",
+                scratch_ours, scratch_theirs]
+
+    result = git_plumbing(args)
+    if result.returncode not in (0, 1):
+        raise RuntimeError(result.stderr.strip() or "git merge-tree failed")
+
+    lines = result.stdout.split("\n")
+    conflicts = []
+    for line in lines[1:]:
+        if not line:
+            break
+        if line not in conflicts:
+            conflicts.append(line)
+    return lines[0].strip(), conflicts
+
+def commit_metadata(commit):
+    """Return (author env, message) of a commit so it can be recreated faithfully."""
+    result = git_plumbing(["show", "-s", "--date=raw", "--format=%an%x00%ae%x00%ad%x00%B", commit])
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f"Cannot read commit {commit}")
+    name, email, date, message = result.stdout.split("\x00", 3)
+    env = dict(os.environ, GIT_AUTHOR_NAME=name, GIT_AUTHOR_EMAIL=email, GIT_AUTHOR_DATE=date)
+    return env, message
+
+def rewrite_commits(commits, mode="drop", dry_run=False):
+    """
+    Drop or revert commits entirely in the object database.
+
+    In "drop" mode the history after the oldest selected commit is replayed
+    without the selected commits; in "revert" mode one revert commit per
+    selection is stacked on HEAD. Either way no ref, index or worktree file
+    is touched until apply_rewrite() is called with the result.
+
+    Args:
+        commits (list): Commit ids (any rev syntax) to remove.
+        mode (str): "drop" to rewrite history or "revert" to add revert commits.
+        dry_run (bool): Stop at the first conflict and report instead of raising.
+
+    Returns:
+        (old_head, new_head, conflicts) where conflicts maps a commit id to
+        the list of paths that could not be merged cleanly.
+    """
+    head = git_plumbing(["rev-parse", "--verify", "HEAD"]).stdout.strip()
+    if not head:
+        raise RuntimeError("Repository has no commits.")
+
+    selected = []
+    for commit in commits:
+        result = git_plumbing(["rev-parse", "--verify", f"{commit}^{{commit}}"])
+        if result.returncode != 0:
+            raise RuntimeError(f"Unknown commit: {commit}")
+        oid = result.stdout.strip()
+        if git_plumbing(["merge-base", "--is-ancestor", oid, head]).returncode != 0:
+            raise RuntimeError(f"Commit {oid[:7]} is not part of the current branch.")
+        if oid not in selected:
+            selected.append(oid)
+
+    # Every commit between the selection and HEAD, oldest first, with its parents
+    selected_parents = []
+    for oid in selected:
+        parents = git_plumbing(["rev-list", "--parents", "-n", "1", oid]).stdout.split()[1:]
+        if not parents:
+            raise RuntimeError(f"Commit {oid[:7]} is the root commit and cannot be removed.")
+        if len(parents) > 1:
+            raise RuntimeError(f"Commit {oid[:7]} is a merge commit and cannot be removed.")
+        selected_parents.append(parents[0])
+    base = git_plumbing(["merge-base", "--octopus"] + selected_parents).stdout.strip()
+    rev_list = git_plumbing(["rev-list", "--reverse", "--topo-order", "--parents", head, f"^{base}"])
+    history = [line.split() for line in rev_list.stdout.splitlines() if line]
+    # Reverting never replays history, so only dropping is limited to linear history
+    if mode == "drop" and any(len(entry) > 2 for entry in history):
+        raise RuntimeError("Merge commits found after the selected commits; history cannot be replayed.")
+
+    native_merge_base = merge_tree_supports_merge_base()
+    conflicts = {}
+
+    if mode == "revert":
+        # Revert newest first, like 'git revert A B C' would
+        new_head = head
+        for oid, parent in [entry for entry in reversed(history) if entry[0] in selected]:
+            tree, conflict_paths = merge_in_memory(oid, new_head, parent, native_merge_base)
+            if conflict_paths:
+                conflicts[oid] = conflict_paths
+                if dry_run:
+                    break
+                raise RuntimeError(f"Reverting {oid[:7]} conflicts in: {', '.join(conflict_paths)}")
+            _, message = commit_metadata(oid)
+            subject = message.splitlines()[0] if message.strip() else oid[:7]
+            new_head = commit_tree(tree, [new_head], f'Revert "{subject}"\n\nThis reverts commit {oid}.\n')
+        return head, new_head, conflicts
+
+    # Drop: replay everything that was not selected onto the parent of the oldest selection
+    new_head = history[0][1]
+    for oid, parent in history:
+        if oid in selected:
+            continue
+        if parent == new_head:
+            # Nothing below this commit changed yet, so it can be kept as is
+            new_head = oid
+            continue
+        tree, conflict_paths = merge_in_memory(parent, new_head, oid, native_merge_base)
+        if conflict_paths:
+            conflicts[oid] = conflict_paths
+            if dry_run:
+                break
+            raise RuntimeError(f"Replaying {oid[:7]} conflicts in: {', '.join(conflict_paths)}")
+        author_env, message = commit_metadata(oid)
+        new_head = commit_tree(tree, [new_head], message, author_env)
+    return head, new_head, conflicts
+
+def apply_rewrite(old_head, new_head, reason):
+    """Move HEAD to new_head, updating only the files that differ in the worktree."""
+    # Two-tree read-tree carries local changes over and refuses to clobber them
+    result = git_plumbing(["read-tree", "-m", "-u", old_head, new_head])
+    if result.returncode != 0:
+        print(Fore.RED + f"Cannot update the working tree: {result.stderr.strip()}")
+        print(Fore.YELLOW + "Tip: Commit or stash your local changes and try again.")
+        return False
+
+    result = git_plumbing(["update-ref", "-m", f"git-helper: {reason}", "HEAD", new_head, old_head])
+    if result.returncode != 0:
+        print(Fore.RED + f"Failed to update HEAD: {result.stderr.strip()}")
+        git_plumbing(["read-tree", "-m", "-u", new_head, old_head])
+        return False
+    return True
+
+# ==================== Push Engine ====================
+
+# Porcelain flags that mean the ref ended up where we wanted it
+PUSH_OK_FLAGS = (" ", "+", "-", "*", "=")
+
+def plan_push(branches=None, default_remote="origin"):
+    """
+    Work out which local branches need pushing, from a single for-each-ref call.
+
+    Args:
+        branches (list): Branch names to consider. Defaults to every branch that
+            is ahead of its upstream, plus the current branch if it has none.
+        default_remote (str): Remote used for branches without an upstream.
+
+    Branches that track a local branch (remote ".") or a remote that is no
+    longer configured are never planned.
+
+    Returns:
+        A dict mapping remote name to a list of (branch, remote_branch, set_upstream).
+    """
+    current = git_plumbing(["symbolic-ref", "--quiet", "--short", "HEAD"]).stdout.strip()
+    remotes = git_plumbing(["remote"]).stdout.split()
+    refs = git_plumbing(["for-each-ref", "--format=%(refname:short)%00%(upstream:remotename)%00"
+                         "%(upstream:remoteref)%00%(upstream:track)", "refs/heads"])
+
+    plan = {}
+    for line in refs.stdout.splitlines():
+        name, remote, remote_ref, track = line.split("\x00")
+        if branches is not None and name not in branches:
+            continue
+        if remote == ".":
+            # Tracks a local branch; pushing to "." would move that branch
+            continue
+        has_upstream = remote and remote_ref and track != "[gone]"
+        if has_upstream:
+            if branches is None and "ahead" not in track:
+                continue
+            target = (name, remote_ref[len("refs/heads/"):], False)
+        else:
+            # Only publish untracked branches that were asked for, or the one we are on
+            if branches is None and name != current:
+                continue
+            remote = remote or default_remote
+            target = (name, name, True)
+        if remote not in remotes:
+            continue
+        plan.setdefault(remote, []).append(target)
+    return plan
+
+def parse_push_porcelain(output):
+    """
+    Parse 'git push --porcelain' output.
+
+    Returns:
+        A list of dicts with flag, source, destination, summary and reason keys.
+    """
+    results = []
+    for line in output.splitlines():
+        fields = line.split("\t")
+        if len(fields) != 3 or len(fields[0]) != 1:
+            continue  # "To <url>", "Done" and anything else that is not a ref line
+        flag, refs, summary = fields
+        source, _, destination = refs.partition(":")
+        reason = ""
+        if summary.endswith(")") and " (" in summary:
+            summary, reason = summary[:-1].split(" (", 1)
+        elif flag == "!":
+            summary, reason = "[rejected]", summary
+        results.append({"flag": flag, "source": source, "destination": destination,
+                        "summary": summary, "reason": reason})
+    return results
+
+def remote_heads(remote, remote_branches):
+    """
+    Look up where branches currently point on a remote.
+
+    Returns:
+        (heads, error) where heads maps remote branch name to its commit id
+        (missing branches are left out) and error is git's message on failure.
+    """
+    result = git_plumbing(["ls-remote", "--heads", remote] +
+                          [f"refs/heads/{branch}" for branch in remote_branches])
+    if result.returncode != 0:
+        return {}, result.stderr.strip() or "git ls-remote failed"
+    heads = {}
+    for line in result.stdout.splitlines():
+        oid, _, ref = line.partition("\t")
+        heads[ref[len("refs/heads/"):]] = oid
+    return heads, ""
+
+def push_branches(remote, targets, force=False, atomic=True):
+    """
+    Push several branches to one remote in a single connection.
+
+    Args:
+        remote (str): Remote name.
+        targets (list): (branch, remote_branch, set_upstream) tuples from plan_push().
+        force (bool): Overwrite what the remote has right now, leased per branch.
+        atomic (bool): Reject every branch if any one of them is rejected.
+
+    Returns:
+        (results, error) where results is the parsed porcelain output and error
+        is git's message when the push could not run at all.
+    """
+    args = ["push", "--porcelain"]
+    if atomic:
+        args.append("--atomic")
+    if force:
+        # A bare --force-with-lease compares against our remote-tracking refs, which are
+        # stale after a "fetch first" rejection. Lease against what the remote has now.
+        heads, error = remote_heads(remote, [remote_branch for _, remote_branch, _ in targets])
+        if error:
+            return [], error
+        for _, remote_branch, _ in targets:
+            args.append(f"--force-with-lease=refs/heads/{remote_branch}:{heads.get(remote_branch, '')}")
+    if any(set_upstream for _, _, set_upstream in targets):
+        # Safe for the other refs too: each is pushed to the upstream it already tracks
+        args.append("--set-upstream")
+    args.append(remote)
+    refspecs = [f"refs/heads/{branch}:refs/heads/{remote_branch}" for branch, remote_branch, _ in targets]
+
+    result = git_plumbing(args + refspecs)
+    if atomic and "does not support --atomic" in result.stderr:
+        # Old servers: fall back to a regular (still single-connection) push
+        args.remove("--atomic")
+        result = git_plumbing(args + refspecs)
+
+    results = parse_push_porcelain(result.stdout)
+    if not results and result.returncode != 0:
+        return [], result.stderr.strip() or "git push failed"
+    return results, ""
+
+def report_push(remote, results):
+    """Print a push summary and return the branches that were rejected, by reason."""
+    rejected = {}
+    for entry in results:
+        branch = entry["source"][len("refs/heads/"):]
+        if entry["flag"] in PUSH_OK_FLAGS:
+            state = "up to date" if entry["flag"] == "=" else entry["summary"]
+            print(Fore.GREEN + f"  {branch} -> {remote}: {state}")
+        else:
+            print(Fore.RED + f"  {branch} -> {remote}: rejected ({entry['reason']})")
+            rejected[branch] = entry["reason"]
+    return rejected
+
+def rejection_causes(failed):
+    """Drop branches that were only rejected because another ref failed an atomic push."""
+    return {branch: reason for branch, reason in failed.items() if reason != "atomic push failed"}
+
+def rebase_onto_upstream(branch):
+    """
+    Run 'git pull --rebase' for the checked out branch, showing git's output on failure.
+
+    A rebase that stops on conflicts is aborted so the branch is left as it was.
+
+    Returns:
+        An empty string on success, otherwise the reason the pull failed.
+    """
+    print(Fore.CYAN + f"Pulling '{branch}' with --rebase before pushing...")
+    result = git_plumbing(["pull", "--rebase"])
+    if result.returncode == 0:
+        return ""
+
+    message = (result.stderr.strip() or result.stdout.strip()) or "git pull --rebase failed"
+    print(Fore.RED + message)
+    rebase_dirs = git_plumbing(["rev-parse", "--git-path", "rebase-merge", "--git-path", "rebase-apply"])
+    if any(os.path.isdir(path) for path in rebase_dirs.stdout.splitlines()):
+        git_plumbing(["rebase", "--abort"])
+        print(Fore.RED + f"The rebase stopped and was aborted; '{branch}' is unchanged. "
+                         "Pull and resolve the conflicts manually.")
+        return "rebase conflicts"
+    print(Fore.RED + f"Could not pull '{branch}'; nothing was changed.")
+    return "pull failed"
+
+def push_all(branches=None, rebase=False, force=False, atomic=True):
+    """
+    Push every branch that needs it, one connection per remote.
+
+    When rebase is set, the checked out branch is first rebased onto its
+    upstream with 'git pull --rebase', so its push is not rejected for being
+    behind. A branch whose pull fails is not pushed.
+
+    Returns:
+        A dict of branch name to failure reason; empty if everything was pushed.
+    """
+    plan = plan_push(branches)
+    if not plan:
+        print(Fore.GREEN + "Nothing to push.")
+        return {}
+
+    failed = {}
+    if rebase:
+        current = git_plumbing(["symbolic-ref", "--quiet", "--short", "HEAD"]).stdout.strip()
+        for remote, targets in plan.items():
+            # Branches without an upstream have nothing to pull
+            if not any(branch == current and not set_upstream for branch, _, set_upstream in targets):
+                continue
+            reason = rebase_onto_upstream(current)
+            if reason:
+                failed[current] = reason
+                plan[remote] = [target for target in targets if target[0] != current]
+
+    for remote, targets in plan.items():
+        if not targets:
+            continue
+        print(Fore.CYAN + f"Pushing {', '.join(branch for branch, _, _ in targets)} to {remote}...")
+        results, error = push_branches(remote, targets, force=force, atomic=atomic)
+        if error:
+            print(Fore.RED + f"Push to {remote} failed: {error}")
+            log_message(f"Error pushing to {remote}: {error}")
+            failed.update((branch, error) for branch, _, _ in targets)
+            continue
+        failed.update(report_push(remote, results))
+    return failed
+
+def push_command(args):
+    """Non-interactive entry point: git-helper push [--rebase] [--force] [branch ...]."""
+    try:
+        subprocess.run(["git", "rev-parse", "--is-inside-work-tree"],
+                      check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except subprocess.CalledProcessError:
+        print(Fore.RED + "Current directory is not a Git repository.")
+        return 1
+
+    branches = [arg for arg in args if not arg.startswith("--")] or None
+    failed = push_all(branches, rebase="--rebase" in args, force="--force" in args)
+    return 1 if failed else 0
+
+# ==================== Staging ====================
+
+# Directories shown in the change summary and files shown before a commit
+SUMMARY_MAX_DIRECTORIES = 20
+COMMIT_PREVIEW_FILES = 50
+# Pathspecs handed to a single 'git add --pathspec-from-file' call
+STAGE_BATCH_SIZE = 1000
+STATUS_COUNT_LABELS = ("staged", "unstaged", "untracked", "conflicted")
+
+def iter_status_entries():
+    """
+    Stream 'git status --porcelain=v2 -z' as (xy, path) pairs.
+
+    The output is read in chunks and never held in memory as a whole, so this
+    stays usable with hundreds of thousands of changed files. xy is the
+    two-letter status code ("??" for untracked files). Raises RuntimeError
+    with git's message if the status cannot be read.
+    """
+    # stderr goes to a file: a pipe that is only read after stdout could fill up and stall git
+    error_file = tempfile.TemporaryFile()
+    process = subprocess.Popen(["git", "status", "--porcelain=v2", "-z"],
+                               stdout=subprocess.PIPE, stderr=error_file)
+    pending = b""
+    skip_original_path = False
+    try:
+        for chunk in iter(lambda: process.stdout.read(65536), b""):
+            records = (pending + chunk).split(b"\0")
+            pending = records.pop()
+            for record in records:
+                if skip_original_path:
+                    # Renames and copies are followed by the original path
+                    skip_original_path = False
+                    continue
+                entry = record.decode("utf-8", "surrogateescape")
+                kind = entry[:1]
+                if kind == "1":
+                    yield entry[2:4], entry.split(" ", 8)[8]
+                elif kind == "2":
+                    skip_original_path = True
+                    yield entry[2:4], entry.split(" ", 9)[9]
+                elif kind == "u":
+                    yield entry[2:4], entry.split(" ", 10)[10]
+                elif kind == "?":
+                    yield "??", entry[2:]
+        if process.wait() != 0:
+            error_file.seek(0)
+            raise RuntimeError(error_file.read().decode("utf-8", "replace").strip() or "git status failed")
+    finally:
+        process.stdout.close()
+        process.wait()
+        error_file.close()
+
+def count_status_entry(counts, xy):
+    """Add one status entry to a dict of staged/unstaged/untracked/conflicted counts."""
+    if xy == "??":
+        counts["untracked"] += 1
+    elif "U" in xy or xy in ("AA", "DD"):
+        counts["conflicted"] += 1
+    else:
+        if xy[0] != ".":
+            counts["staged"] += 1
+        if xy[1] != ".":
+            counts["unstaged"] += 1
+
+def summarize_changes(entries):
+    """
+    Group status entries by top-level directory, and by the level below it.
+
+    Locations are "dir/" for a directory and "." for files directly in the
+    repository root; one level down, "dir/." stands for files directly in dir.
+    An untracked directory without tracked files is a single entry, as git
+    status reports it.
+
+    Returns:
+        (total, summary, nested) where summary maps a top-level location to a
+        dict of staged/unstaged/untracked/conflicted counts, and nested maps
+        each top-level directory to the counts of its own locations.
+    """
+    summary = {}
+    nested = {}
+    total = 0
+    for xy, path in entries:
+        total += 1
+        is_directory = path.endswith("/")
+        parts = path.rstrip("/").split("/", 2)
+        if len(parts) == 1 and not is_directory:
+            count_status_entry(summary.setdefault(".", dict.fromkeys(STATUS_COUNT_LABELS, 0)), xy)
+            continue
+        top = parts[0] + "/"
+        if len(parts) == 3 or (len(parts) == 2 and is_directory):
+            location = top + parts[1] + "/"
+        elif len(parts) == 2:
+            location = top + "."
+        else:
+            location = top
+        count_status_entry(summary.setdefault(top, dict.fromkeys(STATUS_COUNT_LABELS, 0)), xy)
+        count_status_entry(nested.setdefault(top, {}).setdefault(location, dict.fromkeys(STATUS_COUNT_LABELS, 0)), xy)
+    return total, summary, nested
+
+def print_change_summary(total, summary, nested):
+    """Print the per-location entry counts, largest locations first; return them in display order."""
+    locations = dict(summary)
+    # A directory holding most of the changes says little on one line, so split it one level deeper
+    largest = max(summary, key=lambda location: sum(summary[location].values()))
+    if sum(summary[largest].values()) * 2 > total and len(nested.get(largest, {})) > 1:
+        del locations[largest]
+        locations.update(nested[largest])
+
+    ordered = sorted(locations, key=lambda location: -sum(locations[location].values()))
+    print(Fore.CYAN + f"\n{total} status entries in {len(ordered)} location(s) "
+                      "(an untracked directory counts as one entry):")
+    for i, location in enumerate(ordered[:SUMMARY_MAX_DIRECTORIES], 1):
+        counts = locations[location]
+        details = ", ".join(f"{count} {label}" for label, count in counts.items() if count)
+        print(f"{Fore.YELLOW}{i}{Fore.RESET}. {location:<40} {details}")
+    if len(ordered) > SUMMARY_MAX_DIRECTORIES:
+        print(Fore.YELLOW + f"... and {len(ordered) - SUMMARY_MAX_DIRECTORIES} more location(s)")
+    return ordered[:SUMMARY_MAX_DIRECTORIES]
+
+def stage_pathspecs(pathspecs):
+    """Stage pathspecs (paths, directories or globs) in batches; return True on success."""
+    for start in range(0, len(pathspecs), STAGE_BATCH_SIZE):
+        batch = pathspecs[start:start + STAGE_BATCH_SIZE]
+        if len(pathspecs) > STAGE_BATCH_SIZE:
+            print(Fore.CYAN + f"Staging {start + len(batch)}/{len(pathspecs)}...")
+        result = git_plumbing(["add", "-A", "--pathspec-from-file=-", "--pathspec-file-nul"],
+                              input_text="\0".join(batch) + "\0")
+        if result.returncode != 0:
+            print(Fore.RED + f"Failed to stage changes: {result.stderr.strip()}")
+            log_message(f"Error staging {len(batch)} pathspec(s): {result.stderr.strip()}")
+            return False
+    return True
+
+def has_staged_changes():
+    """Check for staged content without listing it."""
+    return git_plumbing(["diff", "--cached", "--quiet"]).returncode == 1
+
+def print_staged_preview():
+    """Show a bounded list of staged files and count the rest from the same stream."""
+    # Without rename detection git compares index and HEAD entries by object id only and
+    # never reads blob contents, so this stays cheap for huge change sets
+    process = subprocess.Popen(["git", "diff", "--cached", "--name-status", "--no-renames"],
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    preview = []
+    total = 0
+    for line in process.stdout:
+        total += 1
+        if total <= COMMIT_PREVIEW_FILES:
+            preview.append(line.rstrip("\n"))
+    process.wait()
+
+    if preview:
+        print(Fore.CYAN + "\nFiles to be committed:")
+        for line in preview:
+            print(line)
+        if total > COMMIT_PREVIEW_FILES:
+            print(Fore.YELLOW + f"... and {total - COMMIT_PREVIEW_FILES} more file(s)")
+        print(Fore.CYAN + f"{total} file(s) staged")
+        print()
+
 # ==================== Main Menu Functions ====================
 
 def switch_branch():
@@ -425,7 +986,7 @@ def create_branch():
         return
     
     run_git_command(["git", "checkout", "-b", branch], f"Failed to create branch {branch}.", f"Created and switched to branch '{branch}' successfully.")
-    prompt_push_changes(set_upstream=True, branch_name=branch)
+    prompt_push_changes()
     input("Press Enter to continue...")
 
 def delete_branch():
@@ -469,17 +1030,20 @@ def delete_branch():
 
 def stage_changes():
     """Stage changes in the working directory."""
-    # Show status before staging
-    status_result = run_git_command(["git", "status", "--short"], check=False)
-    if status_result and not status_result.stdout.strip():
+    # Summarize status per directory instead of listing every file
+    try:
+        total, summary, nested = summarize_changes(iter_status_entries())
+    except RuntimeError as e:
+        print(Fore.RED + f"Command failed: {e}")
+        log_message(f"Error reading status: {e}")
+        input("Press Enter to continue...")
+        return
+    if not total:
         print(Fore.YELLOW + "No changes detected in the working directory.")
         input("Press Enter to continue...")
         return
         
-    # Show changes before staging
-    if status_result:
-        print(Fore.CYAN + "\nChanges to be staged:")
-        print(status_result.stdout)
+    directories = print_change_summary(total, summary, nested)
         
     # Ask which files to stage
     stage_choice = input("Stage all changes? (y/n/b to go back): ").strip().lower()
@@ -488,31 +1052,56 @@ def stage_changes():
     elif stage_choice == 'y':
         run_git_command(["git", "add", "-A"], "Failed to stage changes.", "All changes staged successfully.")
     else:
-        # Interactive staging
-        file_path = input("Enter file/path pattern to stage (or '.' for current directory): ").strip()
-        if file_path:
-            run_git_command(["git", "add", file_path], f"Failed to stage {file_path}.", f"Changes in {file_path} staged successfully.")
+        # Stage by directory number from the summary, or by path/glob pattern
+        selection = input("Enter directory numbers and/or paths or glob patterns to stage, separated by spaces "
+                          "(quote paths that contain spaces): ").strip()
+        if not selection.isdigit() and os.path.exists(selection):
+            # A single path, possibly with spaces, typed without quotes
+            items = [selection]
+        else:
+            try:
+                items = shlex.split(selection)
+            except ValueError as e:
+                print(Fore.RED + f"Invalid input: {e}")
+                input("Press Enter to continue...")
+                return
+        pathspecs = []
+        file_groups = []
+        for item in items:
+            if item.isdigit() and 1 <= int(item) <= len(directories):
+                # Summary paths are relative to the repository root; "." and "dir/." mean
+                # the files directly in the root or in dir
+                directory = directories[int(item) - 1]
+                if directory == "." or directory.endswith("/."):
+                    file_groups.append(directory[:-1])
+                else:
+                    pathspecs.append(f":(top){directory}")
+            else:
+                pathspecs.append(item)
+
+        staged = True
+        for prefix in file_groups:
+            # Needs its own call: the exclude pathspec would apply to every other pathspec too
+            if staged:
+                staged = stage_pathspecs([f":(top,glob){prefix}*", f":(top,glob,exclude){prefix}*/**"])
+        if staged and pathspecs:
+            staged = stage_pathspecs(pathspecs)
+        if staged and (pathspecs or file_groups):
+            print(Fore.GREEN + "Selected changes staged successfully.")
     
     input("Press Enter to continue...")
 
 def commit_changes():
     """Commit staged changes."""
-    # Check if there are staged files
-    status_result = run_git_command(["git", "status", "--porcelain"], "Failed to check repository status.", check=False)
-    
-    if status_result:
-        # Parse status output to detect staged files
-        staged_files = [line for line in status_result.stdout.splitlines() 
-                       if line.startswith("M ") or line.startswith("A ") or line.startswith("D ")]
-        
-        if not staged_files:
-            print(Fore.YELLOW + "No changes staged for commit. Stage files first.")
-            stage_prompt = input("Would you like to stage all changes now? (y/n): ").strip().lower()
-            if stage_prompt == 'y':
-                run_git_command(["git", "add", "-A"], "Failed to stage changes.", "All changes staged successfully.")
-            else:
-                input("Press Enter to continue...")
-                return
+    # Check if there are staged files (covers renames and copies, without listing anything)
+    if not has_staged_changes():
+        print(Fore.YELLOW + "No changes staged for commit. Stage files first.")
+        stage_prompt = input("Would you like to stage all changes now? (y/n): ").strip().lower()
+        if stage_prompt == 'y':
+            run_git_command(["git", "add", "-A"], "Failed to stage changes.", "All changes staged successfully.")
+        else:
+            input("Press Enter to continue...")
+            return
 
     from datetime import datetime
     import os
@@ -522,10 +1111,7 @@ def commit_changes():
     custom_date = prompt("Enter custom commit date: ", default=current_time)
     
     # Show staged files before committing
-    staged_files_result = run_git_command(["git", "diff", "--name-status", "--cached"], check=False)
-    if staged_files_result and staged_files_result.stdout:
-        print(Fore.CYAN + "\nFiles to be committed:")
-        print(staged_files_result.stdout)
+    print_staged_preview()
 
     commit_message = input("Enter commit message (or 'b' to go back): ").strip()
     if commit_message.lower() == 'b':
@@ -564,7 +1150,7 @@ def amend_commit():
     input("Press Enter to continue...")
 
 def delete_commit():
-    """Delete a selected commit by reverting it."""
+    """Delete one or more selected commits without rewriting the working tree per commit."""
     print(Fore.CYAN + "\n===== Delete a Commit =====\n")
     result = run_git_command(["git", "log", "--oneline"], "Failed to list commits.")
     if result:
@@ -578,19 +1164,54 @@ def delete_commit():
             print(f"{i}. {commit}")
         print()  # Add spacing after the list
 
-        commit_num = input("Enter the number of the commit to delete (or 'b' to go back): ").strip()
-        if commit_num.lower() == 'b':
+        commit_nums = input("Enter the number(s) of the commit(s) to delete, separated by spaces (or 'b' to go back): ").strip()
+        if commit_nums.lower() == 'b':
             return
         try:
-            commit_index = int(commit_num) - 1
-            if 0 <= commit_index < len(commits):
-                commit_hash = commits[commit_index].split()[0]
-                run_git_command(["git", "revert", "--no-commit", commit_hash], f"Failed to delete commit {commit_hash}.", "Commit deleted successfully.")
-                run_git_command(["git", "commit", "--amend", "--no-edit"], "Failed to finalize commit deletion.", "Commit history updated successfully.")
+            commit_indexes = [int(num) - 1 for num in commit_nums.replace(",", " ").split()]
+            if commit_indexes and all(0 <= index < len(commits) for index in commit_indexes):
+                commit_hashes = [commits[index].split()[0] for index in commit_indexes]
+
+                print(Fore.CYAN + "How should the commit(s) be deleted?")
+                print("1. Remove from history (rewrites the branch)")
+                print("2. Add revert commit(s) (keeps history)")
+                mode_choice = input("Enter your choice (or 'b' to go back): ").strip().lower()
+                if mode_choice == 'b':
+                    return
+                if mode_choice not in ("1", "2"):
+                    print(Fore.RED + "Invalid choice.")
+                    input("Press Enter to continue...")
+                    return
+                mode = "revert" if mode_choice == "2" else "drop"
+
+                # Dry run first so conflicts are reported before anything is written
+                old_head, new_head, conflicts = rewrite_commits(commit_hashes, mode, dry_run=True)
+                if conflicts:
+                    print(Fore.RED + "Deleting the selected commit(s) would cause conflicts:")
+                    for commit_hash, paths in conflicts.items():
+                        print(Fore.YELLOW + f"  {commit_hash[:7]}:")
+                        for path in paths:
+                            print(f"    {path}")
+                    print(Fore.YELLOW + "No changes were made.")
+                else:
+                    changed = git_plumbing(["diff", "--stat", old_head, new_head]).stdout.strip()
+                    print(Fore.CYAN + "\nChanges to the working tree:")
+                    print(changed or "  (none)")
+                    confirm = input("Apply these changes? (y/n): ").strip().lower()
+                    if confirm == 'y' and apply_rewrite(old_head, new_head, f"{mode} {' '.join(commit_hashes)}"):
+                        print(Fore.GREEN + "Commit(s) deleted successfully.")
+                        print(Fore.GREEN + f"New HEAD: {new_head}")
+                        if mode == "drop":
+                            print(Fore.YELLOW + "History was rewritten. A force push is needed if these commits were already pushed.")
+                    elif confirm != 'y':
+                        print(Fore.YELLOW + "Operation canceled.")
             else:
                 print(Fore.RED + "Invalid commit number.")
         except ValueError:
             print(Fore.RED + "Please enter a valid number.")
+        except RuntimeError as e:
+            print(Fore.RED + f"Failed to delete commit(s): {e}")
+            log_message(f"Error deleting commits {commit_nums}: {e}")
     else:
         print(Fore.RED + "Failed to retrieve commit history. Ensure the repository is initialized and has commits.")
     
@@ -768,6 +1389,8 @@ def create_new_repository():
     input("Press Enter to continue...")
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "push":
+        sys.exit(push_command(sys.argv[2:]))
     try:
         main_menu()
     except KeyboardInterrupt:
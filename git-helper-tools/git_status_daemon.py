@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+# Git Status Daemon - cached branch/dirty/ahead-behind for shell prompts and editors
+#
+# Usage:
+#   git_status_daemon.py query [path]   Print the status of the repo containing path (default: cwd)
+#   git_status_daemon.py serve          Run the daemon in the foreground
+#   git_status_daemon.py stop           Ask a running daemon to shut down
+#
+# The query client starts the daemon on demand, so a prompt only needs to call
+# "query". Only standard library modules are imported here to keep the client
+# start-up time as small as possible.
+
+import os
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+MAX_REPOS = int(os.environ.get("GIT_STATUS_DAEMON_MAX_REPOS", "64"))
+IDLE_TIMEOUT = float(os.environ.get("GIT_STATUS_DAEMON_IDLE_TIMEOUT", "900"))
+REFRESH_INTERVAL = float(os.environ.get("GIT_STATUS_DAEMON_REFRESH", "2"))
+# Only repos queried within this many seconds are refreshed in the background
+ACTIVE_WINDOW = float(os.environ.get("GIT_STATUS_DAEMON_ACTIVE_WINDOW", "300"))
+# Without fsmonitor or a directory mtime change, a repo is still re-read this often
+FALLBACK_INTERVAL = float(os.environ.get("GIT_STATUS_DAEMON_FALLBACK", "30"))
+# A repo whose status takes t seconds is refreshed at most every SLOW_STATUS_FACTOR * t
+SLOW_STATUS_FACTOR = 10
+# Worktrees with more tracked directories than this rely on the fallback interval
+MAX_WATCHED_DIRS = 5000
+CLIENT_TIMEOUT = 0.5
+
+# ==================== Utility Functions ====================
+
+def socket_path():
+    """Return the per-user socket path for the daemon."""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        base = os.path.join(runtime_dir, "git-helper")
+    else:
+        base = os.path.join("/tmp", f"git-helper-{os.getuid()}")
+    os.makedirs(base, mode=0o700, exist_ok=True)
+
+    # Another local user could have created the directory first and planted a socket in it
+    stat = os.lstat(base)
+    if not os.path.isdir(base) or os.path.islink(base) or stat.st_uid != os.getuid() or stat.st_mode & 0o077:
+        raise PermissionError(f"{base} must be a directory owned by the current user with mode 0700")
+    return os.path.join(base, "status.sock")
+
+def find_repo_root(path):
+    """Walk up from path to the worktree root without forking git."""
+    path = os.path.abspath(path)
+    while True:
+        if os.path.exists(os.path.join(path, ".git")):
+            return path
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+def git_dir_for(repo):
+    """Resolve the .git directory of a worktree, following gitdir files."""
+    dot_git = os.path.join(repo, ".git")
+    if os.path.isfile(dot_git):
+        with open(dot_git) as git_file:
+            line = git_file.readline().strip()
+        if line.startswith("gitdir:"):
+            return os.path.normpath(os.path.join(repo, line[len("gitdir:"):].strip()))
+    return dot_git
+
+def repo_fingerprint(git_dir):
+    """Stat the files git rewrites on checkout, commit, stage, fetch and push."""
+    fingerprint = []
+    for name in ("HEAD", "index", "packed-refs", "FETCH_HEAD", "ORIG_HEAD"):
+        try:
+            stat = os.stat(os.path.join(git_dir, name))
+            fingerprint.append((name, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            fingerprint.append((name, None, None))
+    # Loose refs for the checked out branch and its upstream change on commit/fetch
+    for refs_dir in ("refs/heads", "refs/remotes"):
+        try:
+            fingerprint.append((refs_dir, os.stat(os.path.join(git_dir, refs_dir)).st_mtime_ns, None))
+        except OSError:
+            pass
+    try:
+        with open(os.path.join(git_dir, "HEAD")) as head_file:
+            head = head_file.read().strip()
+        if head.startswith("ref: "):
+            stat = os.stat(os.path.join(git_dir, head[5:]))
+            fingerprint.append(("head-ref", stat.st_mtime_ns, stat.st_size))
+    except OSError:
+        pass
+    return tuple(fingerprint)
+
+def read_repo_status(repo):
+    """
+    Collect branch, dirty flag and ahead/behind counts with a single git call.
+
+    Untracked files are not scanned (the dirty flag covers tracked changes only),
+    which keeps the call cheap in large worktrees. core.fsmonitor and
+    core.untrackedCache from the repository config are honoured by git itself.
+    """
+    env = dict(os.environ, GIT_OPTIONAL_LOCKS="0")
+    result = subprocess.run(
+        ["git", "-C", repo, "status", "--porcelain=v2", "--branch", "--untracked-files=no"],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, env=env
+    )
+    if result.returncode != 0:
+        return None
+
+    status = {"branch": "", "dirty": False, "ahead": 0, "behind": 0, "oid": ""}
+    for line in result.stdout.splitlines():
+        if line.startswith("# branch.oid "):
+            status["oid"] = line.split(" ", 2)[2]
+        elif line.startswith("# branch.head "):
+            status["branch"] = line.split(" ", 2)[2]
+        elif line.startswith("# branch.ab "):
+            ahead, behind = line.split(" ")[2:4]
+            status["ahead"] = int(ahead.lstrip("+"))
+            status["behind"] = int(behind.lstrip("-"))
+        elif line and not line.startswith("#"):
+            status["dirty"] = True
+
+    # Show the short commit id instead of "(detached)" like git's own prompt does
+    if status["branch"] == "(detached)" and status["oid"] not in ("", "(initial)"):
+        status["branch"] = status["oid"][:7]
+    return status
+
+def read_head_branch(git_dir):
+    """Return the checked out branch (or short commit id) from HEAD without forking git."""
+    try:
+        with open(os.path.join(git_dir, "HEAD")) as head_file:
+            head = head_file.read().strip()
+    except OSError:
+        return ""
+    if head.startswith("ref: "):
+        ref = head[5:]
+        return ref[len("refs/heads/"):] if ref.startswith("refs/heads/") else ref
+    return head[:7]
+
+def fsmonitor_enabled(repo):
+    """Return True if git status in repo is backed by a filesystem monitor."""
+    result = subprocess.run(
+        ["git", "-C", repo, "config", "--get", "core.fsmonitor"],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    return result.stdout.strip().lower() not in ("", "false", "no", "off", "0")
+
+def tracked_directories(repo):
+    """List the worktree directories that contain tracked files, or None if there are too many."""
+    result = subprocess.run(
+        ["git", "-C", repo, "ls-tree", "-r", "-d", "-z", "--name-only", "HEAD"],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    dirs = [""] + [name for name in result.stdout.split("\0") if name]
+    return dirs if len(dirs) <= MAX_WATCHED_DIRS else None
+
+def directory_stamp(repo, dirs):
+    """
+    Combine the mtimes of the tracked directories into one value.
+
+    Creating, deleting or renaming a file (which includes editors that save by
+    writing a new file and renaming it over the old one) changes the mtime of
+    its directory, so this catches most edits for a few stat calls.
+    """
+    if dirs is None:
+        return None
+    stamp = []
+    for name in dirs:
+        try:
+            stamp.append(os.stat(os.path.join(repo, name)).st_mtime_ns)
+        except OSError:
+            stamp.append(None)
+    return hash(tuple(stamp))
+
+def format_status(status):
+    """Render a status dict as a single prompt-friendly line."""
+    if status is None:
+        return ""
+    parts = [status["branch"] + ("*" if status["dirty"] else "")]
+    if status["ahead"]:
+        parts.append(f"+{status['ahead']}")
+    if status["behind"]:
+        parts.append(f"-{status['behind']}")
+    return " ".join(parts)
+
+# ==================== Daemon ====================
+
+class StatusCache:
+    """
+    LRU cache of repository status, refreshed by a background thread.
+
+    Requests never fork git: get() answers from the cache (or from HEAD alone for
+    a repo it has not read yet) and queues a refresh, so a slow "git status" in a
+    large worktree delays the next prompt's answer rather than this one.
+    """
+
+    def __init__(self, max_repos=MAX_REPOS):
+        self.max_repos = max_repos
+        self.entries = OrderedDict()  # repo -> dict, see new_entry()
+        self.pending = set()
+        self.wakeup = threading.Event()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def new_entry():
+        return {
+            "fingerprint": None, "status": None, "refreshed_at": 0.0, "queried_at": 0.0,
+            "duration": 0.0, "fsmonitor": None, "head_oid": None, "dirs": None, "dir_stamp": None,
+        }
+
+    def queue(self, repo):
+        """Ask the refresher thread to re-read repo as soon as possible."""
+        self.pending.add(repo)
+        self.wakeup.set()
+
+    def get(self, repo):
+        """Return the cached status, or a HEAD-only one, and queue a refresh if git files changed."""
+        git_dir = git_dir_for(repo)
+        # Stat calls are cheap compared to forking git, so every query checks them
+        fingerprint = repo_fingerprint(git_dir)
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(repo)
+            if entry is None:
+                entry = self.entries[repo] = self.new_entry()
+                while len(self.entries) > self.max_repos:
+                    self.entries.popitem(last=False)
+            self.entries.move_to_end(repo)
+            entry["queried_at"] = now
+            status = entry["status"]
+            if status is not None and entry["fingerprint"] == fingerprint:
+                # Worktree edits made while the repo was outside the active window were missed
+                if now - entry["refreshed_at"] > ACTIVE_WINDOW:
+                    self.queue(repo)
+                return status
+            self.queue(repo)
+
+        # Checkout, commit or fetch since the last read: the branch name is the part a
+        # prompt must not get wrong, and HEAD gives it without forking git
+        branch = read_head_branch(git_dir)
+        if status is not None and status["branch"] == branch:
+            return status
+        if not branch:
+            return None
+        return {"branch": branch, "dirty": False, "ahead": 0, "behind": 0}
+
+    def read(self, repo):
+        """Run git status for repo and store the result along with its change signals."""
+        with self.lock:
+            entry = self.entries.get(repo)
+            if entry is None:
+                return
+            fsmonitor, head_oid, dirs = entry["fsmonitor"], entry["head_oid"], entry["dirs"]
+
+        if fsmonitor is None:
+            fsmonitor = fsmonitor_enabled(repo)
+        # Take the change signals before the read so edits made during it are not lost
+        fingerprint = repo_fingerprint(git_dir_for(repo))
+        dir_stamp = directory_stamp(repo, dirs)
+        started = time.monotonic()
+        status = read_repo_status(repo)
+        duration = time.monotonic() - started
+        if status is not None and status["oid"] != head_oid:
+            # The directory list only changes with the tracked tree, so it is re-listed per commit
+            dirs = tracked_directories(repo)
+            dir_stamp = directory_stamp(repo, dirs)
+            head_oid = status["oid"]
+
+        with self.lock:
+            entry = self.entries.get(repo)
+            if entry is not None:
+                entry.update(
+                    fingerprint=fingerprint, status=status, refreshed_at=time.monotonic(),
+                    duration=duration, fsmonitor=fsmonitor, head_oid=head_oid, dirs=dirs,
+                    dir_stamp=dir_stamp,
+                )
+
+    def refresh(self):
+        """Read queued repos, then re-read active repos that show a sign of change."""
+        with self.lock:
+            pending, self.pending = self.pending, set()
+            self.wakeup.clear()
+        for repo in pending:
+            if os.path.isdir(repo):
+                self.read(repo)
+
+        with self.lock:
+            repos = [(repo, dict(entry)) for repo, entry in self.entries.items() if repo not in pending]
+        now = time.monotonic()
+        for repo, entry in repos:
+            if not os.path.isdir(repo):
+                with self.lock:
+                    self.entries.pop(repo, None)
+                continue
+            # Repos nobody has asked about lately keep their entry but cost nothing
+            if now - entry["queried_at"] > ACTIVE_WINDOW:
+                continue
+            # Back off repos whose status is slow so the refresher never dominates the CPU
+            age = now - entry["refreshed_at"]
+            interval = max(REFRESH_INTERVAL, SLOW_STATUS_FACTOR * entry["duration"])
+            if age < interval:
+                continue
+            if repo_fingerprint(git_dir_for(repo)) != entry["fingerprint"]:
+                self.read(repo)
+            elif entry["fsmonitor"]:
+                # With fsmonitor git only looks at paths the watcher reported, so this is cheap
+                self.read(repo)
+            elif directory_stamp(repo, entry["dirs"]) != entry["dir_stamp"]:
+                self.read(repo)
+            elif age >= max(FALLBACK_INTERVAL, interval):
+                # In-place edits do not touch directory mtimes; catch those eventually
+                self.read(repo)
+
+class StatusRequestHandler(socketserver.StreamRequestHandler):
+    """Handle one request line: a repo path, 'ping' or 'stop'."""
+
+    def handle(self):
+        request = self.rfile.readline().decode("utf-8", "replace").strip()
+        self.server.last_request = time.monotonic()
+
+        if request == "ping":
+            self.wfile.write(b"pong\n")
+            return
+        if request == "stop":
+            self.wfile.write(b"stopping\n")
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return
+
+        repo = find_repo_root(request) if request else None
+        status = self.server.cache.get(repo) if repo else None
+        self.wfile.write((format_status(status) + "\n").encode("utf-8"))
+
+class StatusServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path):
+        super().__init__(path, StatusRequestHandler)
+        self.cache = StatusCache()
+        self.last_request = time.monotonic()
+
+def watch_loop(server):
+    """Refresh cached repos and shut the daemon down once it has been idle."""
+    while True:
+        # Queued repos wake the loop at once; otherwise look for changes every second
+        server.cache.wakeup.wait(min(REFRESH_INTERVAL, 1.0))
+        if time.monotonic() - server.last_request > IDLE_TIMEOUT:
+            server.shutdown()
+            return
+        try:
+            server.cache.refresh()
+        except Exception as e:
+            sys.stderr.write(f"git-status-daemon: refresh failed: {e}\n")
+
+def serve():
+    """Run the daemon until it is stopped or goes idle."""
+    try:
+        path = socket_path()
+    except OSError as e:
+        sys.stderr.write(f"git-status-daemon: {e}\n")
+        return 1
+
+    # A leftover socket from a crashed daemon blocks bind(); a live one means we are not needed
+    if os.path.exists(path):
+        try:
+            if send_request("ping", path) == "pong":
+                return 0
+        except socket.timeout:
+            # Alive but busy
+            return 0
+        os.unlink(path)
+
+    try:
+        server = StatusServer(path)
+    except OSError as e:
+        # Another client raced us to start the daemon
+        sys.stderr.write(f"git-status-daemon: could not bind {path}: {e}\n")
+        return 1
+
+    os.chmod(path, 0o600)
+    threading.Thread(target=watch_loop, args=(server,), daemon=True).start()
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+    return 0
+
+# ==================== Client ====================
+
+def send_request(request, path=None):
+    """
+    Send one request line to the daemon and return its reply, or None if it is not running.
+
+    socket.timeout is raised when a daemon accepted the request but did not
+    answer within CLIENT_TIMEOUT.
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(CLIENT_TIMEOUT)
+    try:
+        client.connect(path or socket_path())
+        client.sendall((request + "\n").encode("utf-8"))
+        reply = b""
+        while not reply.endswith(b"\n"):
+            chunk = client.recv(4096)
+            if not chunk:
+                break
+            reply += chunk
+        return reply.decode("utf-8", "replace").rstrip("\n")
+    except socket.timeout:
+        raise
+    except OSError:
+        return None
+    finally:
+        client.close()
+
+def start_daemon():
+    """Start the daemon detached from the calling shell."""
+    subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "serve"],
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True, cwd="/"
+    )
+
+def query(path):
+    """Print the status line for path, starting the daemon if it is not running."""
+    repo = find_repo_root(path)
+    if repo is None:
+        return 1
+
+    try:
+        reply = send_request(repo)
+        if reply is None:
+            # Also covers an unsafe socket directory, in which case the daemon refuses to start
+            start_daemon()
+    except socket.timeout:
+        # The daemon is running but slow to answer; starting another one would not help
+        reply = None
+    if reply is None:
+        # Answer this one directly so the prompt is never empty
+        reply = format_status(read_repo_status(repo))
+
+    if reply:
+        print(reply)
+    return 0
+
+def main(argv):
+    command = argv[1] if len(argv) > 1 else "query"
+    if command == "query":
+        return query(argv[2] if len(argv) > 2 else os.getcwd())
+    elif command == "serve":
+        return serve()
+    elif command == "stop":
+        try:
+            return 0 if send_request("stop") is not None else 1
+        except socket.timeout:
+            return 1
+    print("Usage: git_status_daemon.py [query [path] | serve | stop]", file=sys.stderr)
+    return 2
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
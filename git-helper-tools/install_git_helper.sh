@@ -8,8 +8,9 @@ set -e
 pip install --user -r requirements.txt
 
 # Add git aliases (global)
-git config --global alias.helper '!python "$(pwd)/git_helper_consolidated.py"'
-git config --global alias.gh '!python "$(pwd)/git_helper_consolidated.py"'
+# Expand the install directory now; git runs shell aliases from the repository root
+git config --global alias.helper "!python \"$(pwd)/git_helper_consolidated.py\""
+git config --global alias.gh "!python \"$(pwd)/git_helper_consolidated.py\""
 
 echo "\nGit Helper Tool installed!"
 echo "You can now run 'git helper' or 'git gh' from anywhere."
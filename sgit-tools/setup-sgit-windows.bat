@@ -61,6 +61,7 @@ if %errorlevel% equ 0 (
     echo   sgit-pull                  - Pull all repositories
     echo   sgit-fetch                 - Fetch updates for all repositories
     echo   sgit-unpushed              - Check for unpushed changes
+    echo   sgit-push                  - Push all ahead branches (needs Git Helper)
 ) else (
     echo.
     echo Failed to modify PATH. Please try running this script as Administrator.
@@ -75,7 +76,7 @@ if %errorlevel% equ 0 (
 REM Make scripts executable using Git Bash or WSL if available
 echo.
 echo Setting executable permissions on sgit scripts...
-bash -c "chmod +x \"%install_dir%/sgit\" \"%install_dir%/sgit-status\" \"%install_dir%/sgit-pull\" \"%install_dir%/sgit-fetch\" \"%install_dir%/sgit-unpushed\" \"%install_dir%/shorter-aliases/s-status\" \"%install_dir%/shorter-aliases/s-pull\" \"%install_dir%/shorter-aliases/s-fetch\" \"%install_dir%/shorter-aliases/s-unpushed\"" 2>nul
+bash -c "chmod +x \"%install_dir%/sgit\" \"%install_dir%/sgit-status\" \"%install_dir%/sgit-pull\" \"%install_dir%/sgit-fetch\" \"%install_dir%/sgit-unpushed\" \"%install_dir%/sgit-push\" \"%install_dir%/shorter-aliases/s-status\" \"%install_dir%/shorter-aliases/s-pull\" \"%install_dir%/shorter-aliases/s-fetch\" \"%install_dir%/shorter-aliases/s-unpushed\"" 2>nul
 
 echo.
 echo Setup process complete!
@@ -97,6 +97,7 @@ install_file "$SCRIPT_DIR/sgit-status" "$INSTALL_DIR/sgit-status"
 install_file "$SCRIPT_DIR/sgit-pull" "$INSTALL_DIR/sgit-pull"
 install_file "$SCRIPT_DIR/sgit-fetch" "$INSTALL_DIR/sgit-fetch"
 install_file "$SCRIPT_DIR/sgit-unpushed" "$INSTALL_DIR/sgit-unpushed"
+install_file "$SCRIPT_DIR/sgit-push" "$INSTALL_DIR/sgit-push"
 
 # Install shorter aliases
 install_file "$SCRIPT_DIR/shorter-aliases/s-status" "$INSTALL_DIR/s-status"
@@ -127,6 +128,7 @@ if command -v sgit &>/dev/null; then
   echo -e "  ${BLUE}sgit-pull${NC}                - Pull all repositories"
   echo -e "  ${BLUE}sgit-fetch${NC}               - Fetch updates for all repositories"
   echo -e "  ${BLUE}sgit-unpushed${NC}            - Check for unpushed changes"
+  echo -e "  ${BLUE}sgit-push${NC}                - Push all ahead branches (needs Git Helper)"
   echo
 else
   echo
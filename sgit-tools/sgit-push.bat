@@ -0,0 +1,6 @@
+@echo off
+REM sgit-push batch file for Windows
+REM This calls the sgit script to push all ahead branches using the Git Helper push engine
+
+REM Redirect to bash script
+bash "%~dp0sgit" helper push %*